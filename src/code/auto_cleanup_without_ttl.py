@@ -24,8 +24,12 @@ which handles TTL assignment at the time of snapshot creation.
 """
 
 import datetime
+import itertools
 
-from typing import Iterator
+from typing import Iterable, Iterator
+
+# Name of the placeholder record for a snapshot that is yet to be created.
+_NEW_RECORD = ""
 
 
 class DeleteLogic:
@@ -42,7 +46,7 @@ class DeleteLogic:
         return result
 
     def get_deletes(
-        self, now: datetime.datetime, records: list[tuple[datetime.datetime, str]]
+        self, now: datetime.datetime, records: Iterable[tuple[datetime.datetime, str]]
     ) -> Iterator[tuple[datetime.datetime, str]]:
         # We want at least one per each interval.
         intervals = self._required_intervals(now)
@@ -72,3 +76,21 @@ class DeleteLogic:
             if keep:
                 continue
             yield time, fname
+
+    def get_deletes_with_new(
+        self, now: datetime.datetime, records: Iterable[tuple[datetime.datetime, str]]
+    ) -> tuple[bool, list[tuple[datetime.datetime, str]]]:
+        """Like get_deletes(), considering a new record that would be created now.
+
+        Returns:
+          Whether the new record is needed, and the records to delete.
+        """
+        # get_deletes() checks the order of all records, so it reads every one anyway.
+        deletes = list(
+            self.get_deletes(now, itertools.chain(records, [(now, _NEW_RECORD)]))
+        )
+        # The new record comes last, so only the last delete can be it.
+        if deletes and deletes[-1][1] == _NEW_RECORD:
+            deletes.pop()
+            return False, deletes
+        return True, deletes
@@ -70,6 +70,25 @@ class TestDeletionLogic(unittest.TestCase):
         self.assertEqual(_deleted_times({100: 2, 10: 2}, [-115, -25, -15, -5]), [])
         self.assertEqual(_deleted_times({100: 2, 10: 4}, [-115, -25, -15, -5]), [])
 
+    def test_get_deletes_with_new(self):
+        mgr = auto_cleanup_without_ttl.DeleteLogic(
+            [(datetime.timedelta(seconds=100), 1)]
+        )
+        now = datetime.datetime.fromtimestamp(1664951765)
+        old = now - datetime.timedelta(seconds=115)
+        recent = now - datetime.timedelta(seconds=5)
+
+        # A recent snap already covers the interval; no new one is needed.
+        self.assertEqual(
+            mgr.get_deletes_with_new(now, [(old, "old"), (recent, "recent")]),
+            (False, [(old, "old")]),
+        )
+        # Otherwise the new snap fills it.
+        self.assertEqual(
+            mgr.get_deletes_with_new(now, [(old, "old")]), (True, [(old, "old")])
+        )
+        self.assertEqual(mgr.get_deletes_with_new(now, []), (True, []))
+
 
 if __name__ == "__main__":
     unittest.main()
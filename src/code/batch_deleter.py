@@ -1,9 +1,15 @@
-import contextlib
+import concurrent.futures
 import dataclasses
 import datetime
+import functools
+import io
 import logging
+import math
+import operator
 import os
 import pathlib
+import re
+import sys
 
 from . import configs
 from . import global_flags
@@ -11,10 +17,20 @@ from . import human_interval
 from . import snap_holder
 from .mechanisms import snap_mechanisms
 
-from typing import Any, Iterable, Iterator, Protocol
+from typing import Any, Iterable, Iterator, Optional, Protocol, TypeVar
 
 _FILTERS: dict[str, type["_SnapshotFilterProtocol"]] = {}
 
+# Timestamp formats accepted in iso8601_to_timestamp_string().
+# The groups are year, month, day, hour, minute and optionally second.
+_TIMESTAMP_RE = re.compile(r"(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})")
+_ISO8601_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})[_T ](\d{2}):(\d{2})(?::(\d{2}))?")
+
+# Trigger column displayed for each snapshot trigger.
+# src/code/snap_operator.py has same table.
+_TRIGGER_DISPLAY = {"S": "S  ", "I": " I ", "U": "  U"}
+_TRIGGER_DEFAULT = "   "
+
 
 @dataclasses.dataclass(frozen=True)
 class _ConfigSnapshotsRelation:
@@ -24,37 +40,121 @@ class _ConfigSnapshotsRelation:
 
 def create_config_snapshots_mapping(
     configs_iter: Iterable[configs.Config],
+    *filters: "_SnapshotFilterProtocol",
 ) -> Iterator[_ConfigSnapshotsRelation]:
-    """Create a configuration file and its associated snapshot relationship mapping."""
-    for config in configs_iter:
-        yield _ConfigSnapshotsRelation(config, list(_get_old_backups(config)))
+    """Create a configuration file and its associated snapshot relationship mapping.
+
+    If filters are passed, only the matching snapshots are kept. This is
+    equivalent to apply_snapshot_filters() on the result, but time scope filters
+    are checked on the snapshot names, before any snapshot metadata is loaded.
+    """
+    time_filters = tuple(f for f in filters if isinstance(f, _TimeScopeFilter))
+    other_filters = tuple(f for f in filters if not isinstance(f, _TimeScopeFilter))
+    configs_list = list(configs_iter)
+    if not configs_list:
+        return
+
+    def scan(
+        config: configs.Config, entries: list[os.DirEntry[str]]
+    ) -> _ConfigSnapshotsRelation:
+        snaps = [
+            snap
+            for snap in _get_old_backups(config, entries, time_filters)
+            if all(func(snap) for func in other_filters)
+        ]
+        return _ConfigSnapshotsRelation(config, snaps)
+
+    # Scanning is I/O bound, and directories are often on different devices.
+    # Directory listing and file reads release the GIL, so threads suffice.
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(8, len(configs_list))
+    ) as executor:
+        # Configs commonly share a directory, e.g. /.snapshots. List each only once.
+        destdirs = sorted({os.path.dirname(x.dest_prefix) for x in configs_list})
+        listings = dict(zip(destdirs, executor.map(_list_dir, destdirs)))
+        # Unlike as_completed(), map() retains the order of configs.
+        mappings = list(
+            executor.map(
+                scan,
+                configs_list,
+                [listings[os.path.dirname(x.dest_prefix)] for x in configs_list],
+            )
+        )
+    yield from mappings
+
+
+def _list_dir(destdir: str) -> list[os.DirEntry[str]]:
+    # Unlike listdir() + isdir(), scandir() gets the file type without a stat().
+    with os.scandir(destdir) as entries:
+        return list(entries)
 
 
 # src/code/snap_operator.py has same function
-def _get_old_backups(config: configs.Config) -> Iterator[snap_holder.Snapshot]:
-    """Returns existing backups in chronological order."""
-    destdir = os.path.dirname(config.dest_prefix)
-    for fname in os.listdir(destdir):
-        pathname = os.path.join(destdir, fname)
-        if not os.path.isdir(pathname):
-            continue
-        if not pathname.startswith(config.dest_prefix):
-            continue
+def _get_old_backups(
+    config: configs.Config,
+    entries: Optional[list[os.DirEntry[str]]] = None,
+    time_filters: tuple["_TimeScopeFilter", ...] = (),
+) -> Iterator[snap_holder.Snapshot]:
+    """Returns existing backups in chronological order.
+
+    Args:
+      config: Config whose snapshots will be returned.
+      entries: Pre-fetched listing of the config's directory, if available.
+      time_filters: Only snapshots with timestamps in these scopes are returned.
+    """
+    if entries is None:
+        entries = _list_dir(os.path.dirname(config.dest_prefix))
+    prefix_basename = os.path.basename(config.dest_prefix)
+    matching = [
+        entry
+        for entry in entries
+        if entry.name.startswith(prefix_basename)
+        and entry.is_dir(follow_symlinks=False)
+    ]
+    # Listing order depends on the filesystem; the timestamps sort chronologically.
+    matching.sort(key=lambda entry: entry.name[-global_flags.TIME_FORMAT_LEN :])
+    for entry in matching:
         try:
-            yield snap_holder.Snapshot(pathname)
+            # Parsed once here, and handed over to the Snapshot.
+            snaptime = snap_holder.parse_timestamp(
+                entry.name[-global_flags.TIME_FORMAT_LEN :]
+            )
+            if time_filters:
+                snaptime_ts = snaptime.timestamp()
+                if not all(f.contains(snaptime_ts) for f in time_filters):
+                    continue
+            yield _snapshot_for_path(entry.path, snaptime)
         except ValueError:
-            logging.warning(f"Could not parse timestamp, ignoring: {pathname}")
+            logging.warning(f"Could not parse timestamp, ignoring: {entry.path}")
+
+
+@functools.lru_cache(maxsize=4096)
+def _snapshot_for_path(
+    pathname: str, snaptime: datetime.datetime
+) -> snap_holder.Snapshot:
+    """Avoids parsing the same snapshot and its metadata more than once."""
+    return snap_holder.Snapshot(pathname, snaptime=snaptime)
 
 
 def get_filters(args: dict[str, Any]) -> Iterator["_SnapshotFilterProtocol"]:
-    for arg_name, arg_value in args.items():
-        if arg_name in _FILTERS and arg_value is not None:
-            yield _FILTERS[arg_name](**{arg_name: arg_value})
+    # A filter may take several args, e.g. start and end; create it only once.
+    for cls in dict.fromkeys(_FILTERS.values()):
+        kwargs = {
+            arg_name: args[arg_name]
+            for arg_name in cls.arg_name_set
+            if args.get(arg_name) is not None
+        }
+        if kwargs:
+            yield cls(**kwargs)
+
+
+_FilterT = TypeVar("_FilterT", bound=type["_SnapshotFilterProtocol"])
 
 
-def _register_filter(cls: type["_SnapshotFilterProtocol"]):
+def _register_filter(cls: _FilterT) -> _FilterT:
     for name in cls.arg_name_set:
         _FILTERS[name] = cls
+    return cls
 
 
 class _SnapshotFilterProtocol(Protocol):
@@ -87,15 +187,15 @@ class _TimeScopeFilter(_SnapshotFilterProtocol):
 
     def __init__(self, *, start: str = "", end: str = ""):
         self._start_datetime = (
-            datetime.datetime.strptime(start, global_flags.TIME_FORMAT)
-            if start
-            else datetime.datetime.min
+            snap_holder.parse_timestamp(start) if start else datetime.datetime.min
         )
         self._end_datetime = (
-            datetime.datetime.strptime(end, global_flags.TIME_FORMAT)
-            if end
-            else datetime.datetime.max
+            snap_holder.parse_timestamp(end) if end else datetime.datetime.max
         )
+        # Comparing floats is cheaper than comparing datetimes on every snapshot.
+        # Note that datetime.min and datetime.max cannot be converted to timestamps.
+        self._start_ts = self._start_datetime.timestamp() if start else -math.inf
+        self._end_ts = self._end_datetime.timestamp() if end else math.inf
         logging.info(
             f"Added _TimeScopeFilter: ({self._start_datetime}, {self._end_datetime})"
         )
@@ -108,8 +208,11 @@ class _TimeScopeFilter(_SnapshotFilterProtocol):
     def end_datetime(self) -> datetime.datetime:
         return self._end_datetime
 
+    def contains(self, snaptime_ts: float) -> bool:
+        return self._start_ts <= snaptime_ts < self._end_ts
+
     def __call__(self, snap: snap_holder.Snapshot) -> bool:
-        return self._start_datetime <= snap.snaptime < self._end_datetime
+        return self.contains(snap.snaptime_ts)
 
 
 def apply_snapshot_filters(
@@ -117,13 +220,17 @@ def apply_snapshot_filters(
     *filters: _SnapshotFilterProtocol,
 ) -> Iterator[_ConfigSnapshotsRelation]:
     """Use the filter to select the snapshots\
-       that actually need to be processed for each configuration."""
-    for mapping in config_snaps_mapping:
-        filtered_snaps: list[snap_holder.Snapshot] = []
-        for snap in mapping.snaps:
-            if all(func(snap) for func in filters):
-                filtered_snaps.append(snap)
+       that actually need to be processed for each configuration.
 
+    Kept as API for mappings built elsewhere. When listing from disk, pass the
+    filters to create_config_snapshots_mapping() instead, which checks them
+    while scanning.
+    """
+    for mapping in config_snaps_mapping:
+        filtered_snaps = sorted(
+            (snap for snap in mapping.snaps if all(func(snap) for func in filters)),
+            key=operator.attrgetter("snaptime"),
+        )
         yield _ConfigSnapshotsRelation(mapping.config, filtered_snaps)
 
 
@@ -139,56 +246,82 @@ def show_snapshots_to_be_deleted(
 def _list_snapshots(
     config_snaps_mapping: Iterable[_ConfigSnapshotsRelation],
 ):
-    now = datetime.datetime.now()
+    now_ts = datetime.datetime.now().timestamp()
+    # Buffer and write once, instead of a print() per snapshot.
+    buf = io.StringIO()
+    write = buf.write
 
     for mapping in config_snaps_mapping:
         if not mapping.snaps:
             # Skip displaying config with no matched snapshot to be deleted.
             continue
         config_abs_path = pathlib.Path(mapping.config.config_file).resolve()
-        print(f"Config: {str(config_abs_path)} (source={mapping.config.source})")
-        print(f"Snaps at: {mapping.config.dest_prefix}...")
+        write(f"Config: {str(config_abs_path)} (source={mapping.config.source})\n")
+        write(f"Snaps at: {mapping.config.dest_prefix}...\n")
 
         for snap in mapping.snaps:
             columns = []
-            snap_timestamp = snap.snaptime.strftime(global_flags.TIME_FORMAT)
-            columns.append(f"  {snap_timestamp}")
+            columns.append("  " + snap.timestamp_str)
 
-            trigger_str = "".join(
-                c if snap.metadata.trigger == c else " " for c in "SIU"
-            )
+            trigger_str = _TRIGGER_DISPLAY.get(snap.metadata.trigger, _TRIGGER_DEFAULT)
             columns.append(trigger_str)
 
-            elapsed = (now - snap.snaptime).total_seconds()
-            elapsed_str = f"({human_interval.humanize(elapsed)} ago)"
-            columns.append(f"{elapsed_str:<20}")
+            elapsed = now_ts - snap.snaptime_ts
+            elapsed_str = "(" + _humanize_elapsed(elapsed) + " ago)"
+            columns.append(elapsed_str.ljust(20))
             columns.append(snap.metadata.comment)
 
-            print("  ".join(columns))
-        print()
+            write("  ".join(columns))
+            write("\n")
+        write("\n")
+
+    sys.stdout.write(buf.getvalue())
+
+
+def _humanize_elapsed(elapsed: float) -> str:
+    if elapsed < 0:
+        # Snapshot from the future, e.g. due to a clock change. Rare, not cached.
+        return human_interval.humanize(elapsed)
+    # humanize() displays seconds for intervals under an hour, and a year is not
+    # a whole number of minutes. In between, snapshots taken within the same
+    # minute share the humanized string.
+    if 60 * 60 <= elapsed < 365 * 24 * 60 * 60:
+        return _humanize_cached(int(elapsed // 60) * 60)
+    return _humanize_cached(int(elapsed))
+
+
+@functools.lru_cache(maxsize=1024)
+def _humanize_cached(seconds: int) -> str:
+    return human_interval.humanize(seconds)
 
 
 def delete_snapshots(snaps: Iterable[snap_holder.Snapshot]):
-    for snap in snaps:
-        snap.delete()
+    snap_holder.Snapshot.delete_all(snaps)
+    # Deleted snapshots must not be served from the cache.
+    _snapshot_for_path.cache_clear()
 
 
-def get_to_sync_list(configs: Iterable[configs.Config]) -> list[configs.Config]:
+def get_to_sync_list(
+    config_snaps_mapping: Iterable[_ConfigSnapshotsRelation],
+) -> list[configs.Config]:
+    """Configs which need a sync after their snapshots are deleted."""
     return [
-        config
-        for config in configs
-        if config.snap_type == snap_mechanisms.SnapType.BTRFS
+        mapping.config
+        for mapping in config_snaps_mapping
+        if mapping.snaps and mapping.config.snap_type == snap_mechanisms.SnapType.BTRFS
     ]
 
 
 def iso8601_to_timestamp_string(suffix: str) -> str:
     """Convert an ISO 8601 compliant datetime string to a timestamp string"""
-    with contextlib.suppress(ValueError):
-        dt = datetime.datetime.strptime(suffix, global_flags.TIME_FORMAT)
-        return suffix
-
+    # Common formats are dispatched by regex, instead of trying parsers in turn.
+    match = _TIMESTAMP_RE.fullmatch(suffix) or _ISO8601_RE.fullmatch(suffix)
     try:
-        dt = datetime.datetime.fromisoformat(suffix)
+        if match:
+            year, month, day, hour, minute, second = map(int, match.groups(default="0"))
+            dt = datetime.datetime(year, month, day, hour, minute, second)
+        else:
+            dt = datetime.datetime.fromisoformat(suffix)
     except ValueError:
         raise ValueError(
             "Suffix only accepts the following formats:\n"
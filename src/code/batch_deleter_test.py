@@ -1,10 +1,15 @@
 import datetime
 import itertools
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 from . import batch_deleter
 from . import configs
 from . import global_flags
+from . import human_interval
 from . import snap_holder
 
 # For testing, we can access private methods.
@@ -36,6 +41,8 @@ class TestISO8601ToTimestampString(unittest.TestCase):
             "2024/11/01 20:10:15",
             "2024/11/1_20:10:15",
             "11/01/2024",
+            "20241301201015",
+            "2024-11-32 20:10",
         ]
 
         for suffix in suffix_list:
@@ -76,7 +83,8 @@ class TestGetFilters(unittest.TestCase):
             "end": "202411022010",
         }
         filters_list = list(batch_deleter.get_filters(mininal_args))
-        self.assertEqual(len(filters_list), 3)
+        # Both start and end are handled by a single _TimeScopeFilter.
+        self.assertEqual(len(filters_list), 2)
 
         self.assertEqual(
             getattr(filters_list[0], "_indicator"),
@@ -87,7 +95,7 @@ class TestGetFilters(unittest.TestCase):
             datetime.datetime.strptime(mininal_args["start"], global_flags.TIME_FORMAT),
         )
         self.assertEqual(
-            getattr(filters_list[2], "_end_datetime"),
+            getattr(filters_list[1], "_end_datetime"),
             datetime.datetime.strptime(mininal_args["end"], global_flags.TIME_FORMAT),
         )
 
@@ -206,5 +214,55 @@ class TestSnapshotFilters(unittest.TestCase):
         return snaps
 
 
+class TestHumanizeElapsed(unittest.TestCase):
+    def test_same_as_humanize(self):
+        for elapsed in [-65.5, 0.5, 65.5, 3600.5, 7265.9, 86459.9, 31556736 + 10.5]:
+            with self.subTest(elapsed=elapsed):
+                self.assertEqual(
+                    batch_deleter._humanize_elapsed(elapsed),
+                    human_interval.humanize(elapsed),
+                )
+
+
+class TestCreateConfigSnapshotsMapping(unittest.TestCase):
+    def setUp(self):
+        batch_deleter._snapshot_for_path.cache_clear()
+
+    def test_filters_while_scanning(self):
+        with tempfile.TemporaryDirectory() as dir:
+            for name, trigger in [
+                ("@home-20241101000000", "S"),
+                ("@home-20241102000000", "U"),
+                ("@home-20241103000000", "S"),
+                ("@home-20241201000000", "S"),
+                ("@root-20241102000000", "S"),
+            ]:
+                os.mkdir(os.path.join(dir, name))
+                with open(os.path.join(dir, f"{name}-meta.json"), "w") as f:
+                    json.dump({"trigger": trigger}, f)
+            config = configs.Config(
+                config_file="home.conf",
+                source="/home",
+                dest_prefix=os.path.join(dir, "@home-"),
+            )
+            filters = batch_deleter.get_filters(
+                {"indicator": "S", "start": "20241102000000", "end": "20241130000000"}
+            )
+
+            with mock.patch.object(
+                snap_holder, "Snapshot", wraps=snap_holder.Snapshot
+            ) as mock_snapshot:
+                (mapping,) = batch_deleter.create_config_snapshots_mapping(
+                    [config], *filters
+                )
+
+            self.assertEqual(
+                [snap.target for snap in mapping.snaps],
+                [os.path.join(dir, "@home-20241103000000")],
+            )
+            # Snapshots out of the time scope are never loaded.
+            self.assertEqual(mock_snapshot.call_count, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
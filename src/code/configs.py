@@ -32,6 +32,7 @@ from typing import Iterable, Iterator, Optional
 # Since the scheduled job runs once per hour, this will not result in denser
 # snapshots; just the deletion check will be lineant.
 DURATION_BUFFER = datetime.timedelta(minutes=3)
+DURATION_BUFFER_SECS = int(DURATION_BUFFER.total_seconds())
 
 # User specified config file to use.
 # If set, _CONFIG_PATH will be ignored.
@@ -73,6 +74,11 @@ class Config:
     # If empty, btrfs is assumed.
     snap_type: snap_mechanisms.SnapType = snap_mechanisms.SnapType.BTRFS
 
+    # Result of the last volume check, along with the snap_type and source checked.
+    _compatible_volume: Optional[tuple[snap_mechanisms.SnapType, str, bool]] = (
+        dataclasses.field(default=None, init=False, repr=False, compare=False)
+    )
+
     def is_schedule_enabled(self) -> bool:
         return (
             self.keep_hourly > 0
@@ -135,7 +141,13 @@ class Config:
             os_utils.run_user_script(script, [self.config_file])
 
     def is_compatible_volume(self) -> bool:
-        return snap_mechanisms.get(self.snap_type).verify_volume(self.source)
+        # The check runs shell commands, so only do it once per volume.
+        cached = self._compatible_volume
+        if cached is not None and cached[:2] == (self.snap_type, self.source):
+            return cached[2]
+        result = snap_mechanisms.get(self.snap_type).verify_volume(self.source)
+        self._compatible_volume = (self.snap_type, self.source, result)
+        return result
 
 
 def iterate_configs(source: Optional[str]) -> Iterator[Config]:
@@ -33,6 +33,22 @@ class ConfigsTest(unittest.TestCase):
         )
         self.assertEqual(config, expected_config)
 
+    def test_is_compatible_volume_cached(self):
+        config = configs.Config(config_file="", source="/home", dest_prefix="")
+        mechanism = mock.MagicMock()
+        mechanism.verify_volume.return_value = True
+        with mock.patch.object(
+            configs.snap_mechanisms, "get", return_value=mechanism
+        ) as mock_get:
+            self.assertTrue(config.is_compatible_volume())
+            self.assertTrue(config.is_compatible_volume())
+            mechanism.verify_volume.assert_called_once_with("/home")
+
+            # Checks again if the volume changes.
+            config.source = "/"
+            self.assertTrue(config.is_compatible_volume())
+            self.assertEqual(mock_get.call_count, 2)
+
     def test_post_transaction_scripts(self):
         with tempfile.NamedTemporaryFile(prefix="yabsnap_config_test_") as file:
             with open(configs._example_config_fname()) as example_file:
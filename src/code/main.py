@@ -13,8 +13,8 @@
 # limitations under the License.
 
 import argparse
-import collections
 import datetime
+import functools
 import itertools
 import logging
 
@@ -30,8 +30,11 @@ from .mechanisms import snap_mechanisms
 from typing import Iterable
 
 
-def _parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(prog="yabsnap")
+@functools.cache
+def _build_parser() -> argparse.ArgumentParser:
+    """Singleton, so that the parser is constructed at most once."""
+    # Disabling abbreviations also avoids searching for prefix matches.
+    parser = argparse.ArgumentParser(prog="yabsnap", allow_abbrev=False)
     parser.add_argument(
         "--sync",
         help="Wait for btrfs to sync for any delete operations.",
@@ -148,17 +151,26 @@ def _parse_args() -> argparse.Namespace:
     subparsers.add_parser("internal-cronrun")
     subparsers.add_parser("internal-preupdate")
 
-    args = parser.parse_args()
-    return args
+    return parser
+
+
+def _parse_args() -> argparse.Namespace:
+    return _build_parser().parse_args()
 
 
 def _sync(configs_to_sync: list[configs.Config]):
-    paths_to_sync: dict[snap_mechanisms.SnapType, set[str]] = collections.defaultdict(
-        set
-    )
+    if not configs_to_sync:
+        return
+    paths_to_sync: dict[snap_mechanisms.SnapType, set[str]] = {}
     for config in configs_to_sync:
-        paths_to_sync[config.snap_type].add(config.mount_path)
-    for snap_type, paths in sorted(paths_to_sync.items()):
+        paths_to_sync.setdefault(config.snap_type, set()).add(config.mount_path)
+    # Sorting is only needed for a deterministic order across multiple types.
+    items = (
+        paths_to_sync.items()
+        if len(paths_to_sync) == 1
+        else sorted(paths_to_sync.items(), key=lambda item: item[0].value)
+    )
+    for snap_type, paths in items:
         snap_mechanisms.get(snap_type).sync_paths(paths)
 
 
@@ -192,30 +204,33 @@ def _batch_delete_snaps(
     args: argparse.Namespace,
     sync: bool,
 ):
-    config_snaps_mapping_tuple = list(
-        batch_deleter.create_config_snapshots_mapping(configs_iter)
-    )
     args_as_dict = vars(args)
     filters = batch_deleter.get_filters(args_as_dict)
 
-    targets = list(
-        batch_deleter.apply_snapshot_filters(config_snaps_mapping_tuple, *filters)
-    )
-    if sum(len(mapping.snaps) for mapping in targets) == 0:
+    # Only configs with matching snapshots are of interest from here on.
+    targets = [
+        mapping
+        for mapping in batch_deleter.create_config_snapshots_mapping(
+            configs_iter, *filters
+        )
+        if mapping.snaps
+    ]
+    if not targets:
         os_utils.eprint("No snapshots matching the criteria were found.")
         return
 
     batch_deleter.show_snapshots_to_be_deleted(targets)
 
-    if os_utils.interactive_confirm(
+    if not os_utils.interactive_confirm(
         "Are you sure you want to delete the above snapshots?"
     ):
-        snaps = itertools.chain.from_iterable(mapping.snaps for mapping in targets)
-        batch_deleter.delete_snapshots(snaps)
+        return
+
+    snaps = itertools.chain.from_iterable(mapping.snaps for mapping in targets)
+    batch_deleter.delete_snapshots(snaps)
 
     if sync:
-        to_sync = batch_deleter.get_to_sync_list(mapping.config for mapping in targets)
-        _sync(to_sync)
+        _sync(batch_deleter.get_to_sync_list(targets))
 
 
 def _config_operation(
@@ -228,8 +243,12 @@ def _config_operation(
     to_sync: list[configs.Config] = []
 
     # Commands that need to access existing config.
-    for config in configs.iterate_configs(source=source):
-        snapper = snap_operator.SnapOperator(config, now)
+    configs_list = list(configs.iterate_configs(source=source))
+    existing_snaps = snap_operator.prefetch_all(configs_list)
+    for config in configs_list:
+        snapper = snap_operator.SnapOperator(
+            config, now, existing_snaps=existing_snaps.get(config.config_file)
+        )
         if command == "internal-cronrun":
             snapper.scheduled()
         elif command == "internal-preupdate":
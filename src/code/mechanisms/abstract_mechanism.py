@@ -42,6 +42,14 @@ class SnapMechanism(abc.ABC):
     def delete(self, destination: str):
         """Deletes an existing snapshot."""
 
+    def delete_many(self, destinations: list[str]):
+        """Deletes existing snapshots.
+
+        Override if the mechanism can delete several snapshots at once.
+        """
+        for destination in destinations:
+            self.delete(destination)
+
     @abc.abstractmethod
     def rollback_gen(self, source_dests: list[tuple[str, str]]) -> list[str]:
         """Returns shell lines which when executed will result in a rollback of snapshots.
@@ -58,8 +58,14 @@ class BtrfsSnapMechanism(abstract_mechanism.SnapMechanism):
             raise
 
     def delete(self, destination: str):
+        self.delete_many([destination])
+
+    def delete_many(self, destinations: list[str]):
+        if not destinations:
+            return
+        # A single command avoids spawning one process per snapshot.
         try:
-            _execute_sh(f"btrfs subvolume delete {destination}")
+            _execute_sh("btrfs subvolume delete " + " ".join(destinations))
         except os_utils.CommandError:
             logging.error("Unable to delete; are you running as root?")
             raise
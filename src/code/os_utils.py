@@ -82,11 +82,13 @@ def eprint(*args: Any, **kwargs: Any) -> None:
     print(*args, file=sys.stderr, **kwargs)
 
 
+# Answers accepted as confirmation, after lowercasing.
+_CONFIRMATIONS = frozenset({"y", "yes"})
+
+
 def interactive_confirm(msg: str) -> bool:
     user_choice = input(f"{msg} [y/N] ")
-    match user_choice.lower():
-        case "y" | "yes":
-            return True
-        case _:
-            eprint("Aborted.")
-            return False
+    if user_choice.strip().lower() in _CONFIRMATIONS:
+        return True
+    eprint("Aborted.")
+    return False
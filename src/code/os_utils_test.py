@@ -15,6 +15,7 @@
 import os
 import tempfile
 import unittest
+from unittest import mock
 
 from . import os_utils
 
@@ -31,6 +32,21 @@ class OsUtilsTest(unittest.TestCase):
             # Script does not exist.
             self.assertFalse(os_utils.run_user_script(os.path.join(dir, "test.sh"), []))
 
+    def test_interactive_confirm(self):
+        for answer, expected in [
+            ("y", True),
+            ("Yes", True),
+            (" YES ", True),
+            ("", False),
+            ("n", False),
+            ("yess", False),
+        ]:
+            with self.subTest(answer=answer):
+                with mock.patch(
+                    "builtins.input", return_value=answer
+                ), mock.patch.object(os_utils, "eprint"):
+                    self.assertEqual(os_utils.interactive_confirm("Sure?"), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
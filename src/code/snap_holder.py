@@ -17,21 +17,42 @@ The existence of this object doesn't mean the snapshot exists;
 it can also be an empty place holder.
 """
 
+import collections
 import dataclasses
 import datetime
 import json
 import logging
 import os
+import stat
 
 from . import global_flags
 from . import human_interval
 from . import os_utils
 from .mechanisms import snap_mechanisms
 
-from typing import Any
+from typing import Any, Iterable
 
 
-@dataclasses.dataclass
+def parse_timestamp(timestr: str) -> datetime.datetime:
+    """Parses a timestamp in global_flags.TIME_FORMAT.
+
+    Raises:
+      ValueError: If the string is not a valid timestamp.
+    """
+    if len(timestr) == global_flags.TIME_FORMAT_LEN and timestr.isdigit():
+        # Much faster than strptime() for the fixed width format.
+        return datetime.datetime(
+            int(timestr[0:4]),
+            int(timestr[4:6]),
+            int(timestr[6:8]),
+            int(timestr[8:10]),
+            int(timestr[10:12]),
+            int(timestr[12:14]),
+        )
+    return datetime.datetime.strptime(timestr, global_flags.TIME_FORMAT)
+
+
+@dataclasses.dataclass(slots=True)
 class _Metadata:
     # Snapshot type. If empty, assumed btrfs.
     snap_type: str = snap_mechanisms.SnapType.UNKNOWN.value
@@ -62,43 +83,105 @@ class _Metadata:
         if global_flags.FLAGS.dryrun:
             os_utils.eprint(f"Would create {fname}: {data}")
             return
+        _METADATA_CACHE.pop(fname, None)
         with open(fname, "w") as f:
             json.dump(data, f, indent=2)
 
     @classmethod
     def load_file(cls, fname: str) -> "_Metadata":
-        if os.path.isfile(fname):
-            with open(fname) as f:
-                all_args = json.load(f)
-                if "snap_type" not in all_args:
-                    # For back compatibility. Older snaps will not have snap_type.
-                    all_args["snap_type"] = "BTRFS"
-                try:
-                    return cls(**all_args)
-                except json.JSONDecodeError:
-                    logging.warning(f"Unable to parse metadata file: {fname}")
-        return cls()
+        try:
+            stat_result = os.stat(fname)
+        except OSError:
+            return cls()
+        if not stat.S_ISREG(stat_result.st_mode):
+            return cls()
+        # The cache is valid as long as the file is not modified.
+        file_version = (stat_result.st_mtime_ns, stat_result.st_size)
+        cached = _METADATA_CACHE.get(fname)
+        if cached is not None and cached[0] == file_version:
+            # Return a copy, since callers may modify the metadata.
+            return dataclasses.replace(cached[1])
+
+        with open(fname) as f:
+            all_args = json.load(f)
+            if "snap_type" not in all_args:
+                # For back compatibility. Older snaps will not have snap_type.
+                all_args["snap_type"] = "BTRFS"
+            try:
+                metadata = cls(**all_args)
+            except json.JSONDecodeError:
+                logging.warning(f"Unable to parse metadata file: {fname}")
+                return cls()
+        _METADATA_CACHE[fname] = (file_version, metadata)
+        return dataclasses.replace(metadata)
+
+
+# Deserialized metadata files, with the (mtime_ns, size) they were read at.
+_METADATA_CACHE: dict[str, tuple[tuple[int, int], _Metadata]] = {}
 
 
 class Snapshot:
-    def __init__(self, target: str) -> None:
+    # Many of these may be held when listing, so avoid a __dict__ for each.
+    __slots__ = (
+        "_target",
+        "_timestamp_str",
+        "_snaptime",
+        "_snaptime_ts",
+        "_metadata_fname",
+        "_metadata",
+        "_dryrun",
+    )
+
+    def __init__(self, target: str, snaptime: datetime.datetime | None = None) -> None:
         # The full pathname of the snapshot directory.
         # Also exposed as a public property .target.
         self._target = target
-        timestr = self._target[-global_flags.TIME_FORMAT_LEN :]
-        self._snaptime = datetime.datetime.strptime(timestr, global_flags.TIME_FORMAT)
+        self._timestamp_str = self._target[-global_flags.TIME_FORMAT_LEN :]
+        # Callers which already parsed the timestamp from the name may pass it.
+        if snaptime is None:
+            snaptime = parse_timestamp(self._timestamp_str)
+        self._snaptime = snaptime
+        self._snaptime_ts: float | None = None
         self._metadata_fname = target + "-meta.json"
-        self.metadata = _Metadata.load_file(self._metadata_fname)
+        self._metadata: _Metadata | None = None
         self._dryrun = False
 
+    @property
+    def metadata(self) -> _Metadata:
+        # Loaded on first access, since many operations only need the snaptime.
+        if self._metadata is None:
+            self._metadata = _Metadata.load_file(self._metadata_fname)
+        return self._metadata
+
+    def __eq__(self, other: object) -> bool:
+        # A snapshot is identified by its path.
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return self._target == other._target
+
+    def __hash__(self) -> int:
+        return hash(self._target)
+
     @property
     def target(self) -> str:
         return self._target
 
+    @property
+    def timestamp_str(self) -> str:
+        """The snaptime as it appears in the target, in global_flags.TIME_FORMAT."""
+        return self._timestamp_str
+
     @property
     def snaptime(self) -> datetime.datetime:
         return self._snaptime
 
+    @property
+    def snaptime_ts(self) -> float:
+        """Unix timestamp of snaptime."""
+        if self._snaptime_ts is None:
+            self._snaptime_ts = self._snaptime.timestamp()
+        return self._snaptime_ts
+
     @property
     def _snap_type(self) -> snap_mechanisms.SnapType:
         snap_type = snap_mechanisms.SnapType[self.metadata.snap_type]
@@ -143,7 +226,35 @@ class Snapshot:
         # First delete the snapshot.
         snap_mechanisms.get(self._snap_type).delete(self._target)
         # Then delete the metadata.
+        self._delete_metadata()
+
+    @staticmethod
+    def delete_all(snaps: Iterable["Snapshot"]) -> None:
+        """Deletes snapshots, with one call to each snapshot mechanism involved."""
+        snaps_by_type: dict[snap_mechanisms.SnapType, list[Snapshot]] = (
+            collections.defaultdict(list)
+        )
+        for snap in snaps:
+            snaps_by_type[snap._snap_type].append(snap)
+        for snap_type, snaps_of_type in snaps_by_type.items():
+            # First delete the snapshots.
+            try:
+                snap_mechanisms.get(snap_type).delete_many(
+                    [x.target for x in snaps_of_type]
+                )
+            except os_utils.CommandError:
+                # Some may be gone before the failure; don't orphan their metadata.
+                for snap in snaps_of_type:
+                    if not os.path.exists(snap.target):
+                        snap._delete_metadata()
+                raise
+            # Then delete the metadata.
+            for snap in snaps_of_type:
+                snap._delete_metadata()
+
+    def _delete_metadata(self) -> None:
         if not global_flags.FLAGS.dryrun:
+            _METADATA_CACHE.pop(self._metadata_fname, None)
             if os.path.exists(self._metadata_fname):
                 os.remove(self._metadata_fname)
         else:
@@ -20,6 +20,7 @@ import tempfile
 import unittest
 from unittest import mock
 
+from . import os_utils
 from . import snap_holder
 from .mechanisms import btrfs_mechanism
 from .mechanisms import snap_mechanisms
@@ -32,6 +33,31 @@ _NOW = datetime.datetime(2025, 1, 30, hour=12, minute=0, second=0)
 
 
 class SnapHolderTest(unittest.TestCase):
+    def test_parse_timestamp(self):
+        self.assertEqual(
+            snap_holder.parse_timestamp("20231122193630"),
+            datetime.datetime(2023, 11, 22, hour=19, minute=36, second=30),
+        )
+        for timestr in ["20231322193630", "2023112219363x", "2023-11-22"]:
+            with self.subTest(timestr=timestr):
+                with self.assertRaises(ValueError):
+                    snap_holder.parse_timestamp(timestr)
+
+    def test_preparsed_snaptime(self):
+        snaptime = datetime.datetime(2023, 11, 22, hour=19, minute=36, second=30)
+        with mock.patch.object(snap_holder, "parse_timestamp") as mock_parse:
+            snap = snap_holder.Snapshot("/snaps/root-20231122193630", snaptime=snaptime)
+        mock_parse.assert_not_called()
+        self.assertIs(snap.snaptime, snaptime)
+
+    def test_identity(self):
+        snap = snap_holder.Snapshot("/snaps/root-20231122193630")
+        self.assertEqual(snap, snap_holder.Snapshot("/snaps/root-20231122193630"))
+        self.assertNotEqual(snap, snap_holder.Snapshot("/snaps/home-20231122193630"))
+        self.assertEqual(
+            len({snap, snap_holder.Snapshot("/snaps/root-20231122193630")}), 1
+        )
+
     def test_create_and_delete(self):
         with tempfile.TemporaryDirectory() as dir:
             snap_destination = os.path.join(dir, "root-20231122193630")
@@ -64,6 +90,70 @@ class SnapHolderTest(unittest.TestCase):
             mock_delete.assert_called_once_with(snap_destination)
             self.assertFalse(os.path.exists(f"{snap_destination}-meta.json"))
 
+    def test_delete_all(self):
+        with tempfile.TemporaryDirectory() as dir:
+            snap_destinations = [
+                os.path.join(dir, "root-20231122193630"),
+                os.path.join(dir, "root-20231123193630"),
+            ]
+            for snap_destination in snap_destinations:
+                with open(f"{snap_destination}-meta.json", "w") as f:
+                    json.dump({"snap_type": "BTRFS"}, f)
+            snaps = [snap_holder.Snapshot(x) for x in snap_destinations]
+
+            with mock.patch.object(
+                btrfs_mechanism.BtrfsSnapMechanism, "delete_many", return_value=None
+            ) as mock_delete_many:
+                snap_holder.Snapshot.delete_all(snaps)
+            mock_delete_many.assert_called_once_with(snap_destinations)
+            for snap_destination in snap_destinations:
+                self.assertFalse(os.path.exists(f"{snap_destination}-meta.json"))
+
+    def test_delete_all_btrfs_single_command(self):
+        with tempfile.TemporaryDirectory() as dir:
+            snap_destinations = [
+                os.path.join(dir, "root-20231122193630"),
+                os.path.join(dir, "root-20231123193630"),
+            ]
+            for snap_destination in snap_destinations:
+                with open(f"{snap_destination}-meta.json", "w") as f:
+                    json.dump({"snap_type": "BTRFS"}, f)
+            snaps = [snap_holder.Snapshot(x) for x in snap_destinations]
+
+            with mock.patch.object(os_utils, "execute_sh") as mock_execute_sh:
+                snap_holder.Snapshot.delete_all(snaps)
+                mock_execute_sh.assert_called_once_with(
+                    "btrfs subvolume delete " + " ".join(snap_destinations)
+                )
+
+                # Nothing to delete; no process is spawned.
+                mock_execute_sh.reset_mock()
+                btrfs_mechanism.BtrfsSnapMechanism().delete_many([])
+                mock_execute_sh.assert_not_called()
+
+    def test_delete_all_partial_failure(self):
+        with tempfile.TemporaryDirectory() as dir:
+            deleted, remaining = [
+                os.path.join(dir, "root-20231122193630"),
+                os.path.join(dir, "root-20231123193630"),
+            ]
+            for snap_destination in [deleted, remaining]:
+                with open(f"{snap_destination}-meta.json", "w") as f:
+                    json.dump({"snap_type": "BTRFS"}, f)
+            # Only the snapshot which could not be deleted is still there.
+            os.mkdir(remaining)
+            snaps = [snap_holder.Snapshot(x) for x in [deleted, remaining]]
+
+            with mock.patch.object(
+                btrfs_mechanism.BtrfsSnapMechanism,
+                "delete_many",
+                side_effect=os_utils.CommandError("Unable to run command"),
+            ):
+                with self.assertRaises(os_utils.CommandError):
+                    snap_holder.Snapshot.delete_all(snaps)
+            self.assertFalse(os.path.exists(f"{deleted}-meta.json"))
+            self.assertTrue(os.path.exists(f"{remaining}-meta.json"))
+
     def test_backcompat(self):
         with tempfile.TemporaryDirectory() as dir:
             snap_destination = os.path.join(dir, "root-20231122193630")
@@ -74,6 +164,48 @@ class SnapHolderTest(unittest.TestCase):
             # Without any snap_type, defaults to BTRFS to continue working with old snaps.
             self.assertEqual(snap._snap_type, snap_mechanisms.SnapType.BTRFS)
 
+    def test_metadata_loaded_lazily(self):
+        with mock.patch.object(
+            snap_holder._Metadata,
+            "load_file",
+            return_value=snap_holder._Metadata(comment="lazy"),
+        ) as mock_load_file:
+            snap = snap_holder.Snapshot("/snaps/root-20231122193630")
+            # Name based accessors don't need the metadata.
+            self.assertEqual(snap.target, "/snaps/root-20231122193630")
+            self.assertEqual(snap.timestamp_str, "20231122193630")
+            _ = snap.snaptime_ts
+            mock_load_file.assert_not_called()
+
+            self.assertEqual(snap.metadata.comment, "lazy")
+            self.assertEqual(snap.metadata.comment, "lazy")
+            mock_load_file.assert_called_once_with(
+                "/snaps/root-20231122193630-meta.json"
+            )
+
+    def test_metadata_cache(self):
+        with tempfile.TemporaryDirectory() as dir:
+            snap_destination = os.path.join(dir, "root-20231122193630")
+            with open(f"{snap_destination}-meta.json", "w") as f:
+                json.dump({"snap_type": "BTRFS", "comment": "first"}, f)
+            snap = snap_holder.Snapshot(snap_destination)
+            self.assertEqual(snap.metadata.comment, "first")
+
+            # Unmodified file is not read again.
+            with mock.patch.object(json, "load") as mock_load:
+                snap2 = snap_holder.Snapshot(snap_destination)
+                self.assertEqual(snap2.metadata.comment, "first")
+            mock_load.assert_not_called()
+            # Each snapshot has its own copy.
+            snap2.metadata.comment = "changed"
+            self.assertEqual(snap.metadata.comment, "first")
+
+            # Saved changes are seen by new snapshots.
+            snap2.set_ttl("", now=_NOW)
+            self.assertEqual(
+                snap_holder.Snapshot(snap_destination).metadata.comment, "changed"
+            )
+
     def test_filecontent(self):
         with tempfile.TemporaryDirectory() as dir:
             snap_destination = os.path.join(dir, "root-20231122193630")
@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import datetime
 import json
 import logging
 import os
+import sys
 
 from . import auto_cleanup_without_ttl
 from . import configs
@@ -27,24 +29,89 @@ from . import snap_holder
 
 from typing import Any, Iterator, Optional, TypeVar
 
+# Values of snapshot metadata's trigger; see snap_holder._Metadata.
+_TRIG_SCHEDULED = "S"
+_TRIG_INSTALL = "I"
+_TRIG_USER = "U"
 
-def _get_existing_snaps(config: configs.Config) -> Iterator[snap_holder.Snapshot]:
-    """Returns existing backups in chronological order."""
-    destdir = os.path.dirname(config.dest_prefix)
+# Trigger column displayed for each snapshot trigger.
+# src/code/batch_deleter.py has same table.
+_TRIGGER_COLS = {"S": "S  ", "I": " I ", "U": "  U"}
 
+# Compact, key-sorted encoder shared by all rows of the JSON listing.
+_JSON_ENCODE = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+
+
+def _list_dir(destdir: str) -> list[os.DirEntry[str]]:
     if not os.access(destdir, os.R_OK):
         raise PermissionError(f"Cannot access snapshots in {destdir}; run as root?")
-
-    for fname in os.listdir(destdir):
-        pathname = os.path.join(destdir, fname)
-        if not os.path.isdir(pathname):
-            continue
-        if not pathname.startswith(config.dest_prefix):
-            continue
+    # Unlike listdir() + isdir(), scandir() gets the file type without a stat().
+    with os.scandir(destdir) as entries:
+        return list(entries)
+
+
+# src/code/batch_deleter.py has same function
+def _get_existing_snaps(
+    config: configs.Config, entries: Optional[list[os.DirEntry[str]]] = None
+) -> Iterator[snap_holder.Snapshot]:
+    """Returns existing backups in chronological order.
+
+    Args:
+      config: Config whose snapshots will be returned.
+      entries: Pre-fetched listing of the config's directory, if available.
+    """
+    if entries is None:
+        entries = _list_dir(os.path.dirname(config.dest_prefix))
+    prefix_basename = os.path.basename(config.dest_prefix)
+    matching = [
+        entry
+        for entry in entries
+        if entry.name.startswith(prefix_basename)
+        and entry.is_dir(follow_symlinks=False)
+    ]
+    # Listing order depends on the filesystem; the timestamps sort chronologically.
+    matching.sort(key=lambda entry: entry.name[-global_flags.TIME_FORMAT_LEN :])
+    for entry in matching:
         try:
-            yield snap_holder.Snapshot(pathname)
+            yield snap_holder.Snapshot(entry.path)
         except ValueError:
-            logging.warning(f"Could not parse timestamp, ignoring: {pathname}")
+            logging.warning("Could not parse timestamp, ignoring: %s", entry.path)
+
+
+def _scan_destdirs(
+    configs_list: list[configs.Config],
+) -> dict[str, list[os.DirEntry[str]]]:
+    """Lists each distinct snapshot directory once, skipping inaccessible ones."""
+    destdirs = [
+        x
+        for x in dict.fromkeys(os.path.dirname(c.dest_prefix) for c in configs_list)
+        if os.access(x, os.R_OK)
+    ]
+    if not destdirs:
+        return {}
+    # Same as in batch_deleter; listing is I/O bound and releases the GIL.
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(8, len(destdirs))
+    ) as executor:
+        return dict(zip(destdirs, executor.map(_list_dir, destdirs)))
+
+
+def prefetch_all(
+    configs_list: list[configs.Config],
+) -> dict[str, list[snap_holder.Snapshot]]:
+    """Returns existing snaps keyed by config file, to seed SnapOperator.
+
+    Configs commonly share a directory, e.g. /.snapshots, which is scanned
+    only once for all of them. Configs with inaccessible directories are left
+    out, so that the error surfaces when the SnapOperator lists them.
+    """
+    listings = _scan_destdirs(configs_list)
+    result: dict[str, list[snap_holder.Snapshot]] = {}
+    for config in configs_list:
+        entries = listings.get(os.path.dirname(config.dest_prefix))
+        if entries is not None:
+            result[config.config_file] = list(_get_existing_snaps(config, entries))
+    return result
 
 
 def find_target(config: configs.Config, suffix: str) -> Optional[snap_holder.Snapshot]:
@@ -55,7 +122,7 @@ def find_target(config: configs.Config, suffix: str) -> Optional[snap_holder.Sna
         )
     for snap in _get_existing_snaps(config):
         if snap.target.endswith(suffix):
-            return snap_holder.Snapshot(snap.target)
+            return snap
     return None
 
 
@@ -72,11 +139,29 @@ def _all_but_last_k(array: list[_GenericT], k: int) -> Iterator[_GenericT]:
     yield from array[: len(array) - k]
 
 
+def _scheduled_candidates(
+    snaps: list[snap_holder.Snapshot],
+) -> Iterator[tuple[datetime.datetime, str]]:
+    """Yields (snaptime, target) of scheduled or untriggered snaps."""
+    for snap in snaps:
+        trigger = snap.metadata.trigger
+        if trigger == "" or trigger == _TRIG_SCHEDULED:
+            yield snap.snaptime, snap.target
+
+
 class SnapOperator:
-    def __init__(self, config: configs.Config, now: datetime.datetime) -> None:
+    def __init__(
+        self,
+        config: configs.Config,
+        now: datetime.datetime,
+        existing_snaps: Optional[list[snap_holder.Snapshot]] = None,
+    ) -> None:
         self._config = config
         self._now = now
-        self._now_str = self._now.strftime(global_flags.TIME_FORMAT)
+        # Pathname of any new snapshot taken by this operator.
+        self._new_target = config.dest_prefix + now.strftime(global_flags.TIME_FORMAT)
+        # All existing snaps' targets start with this prefix.
+        self._prefix_len = len(config.dest_prefix)
         # Set to true on any create operation.
         self.snaps_created = False
         # Set to true on any delete operation. If True, may run a btrfs subv sync.
@@ -84,6 +169,15 @@ class SnapOperator:
         # Temporarily holds all snaps to delete on scheduled().
         # This enables the actual operation of deleting them to happen at the end.
         self._scheduled_to_delete: list[snap_holder.Snapshot] = []
+        # Existing snaps, listed on first use unless pre-fetched.
+        # Reset on any create or delete.
+        self._snaps_cache: Optional[list[snap_holder.Snapshot]] = existing_snaps
+
+    def _existing_snaps(self) -> list[snap_holder.Snapshot]:
+        """Returns existing backups in chronological order."""
+        if self._snaps_cache is None:
+            self._snaps_cache = list(_get_existing_snaps(self._config))
+        return self._snaps_cache
 
     # Part of scheduled().
     def _delete_expired_ttl(
@@ -93,7 +187,7 @@ class SnapOperator:
         remaining: list[snap_holder.Snapshot] = []
         for snap in snaps:
             if snap.metadata.is_expired(self._now):
-                logging.info(f"Expired snapshot: {snap.target}")
+                logging.info("Expired snapshot: %s", snap.target)
                 self._scheduled_to_delete.append(snap)
             else:
                 remaining.append(snap)
@@ -130,18 +224,11 @@ class SnapOperator:
         Returns:
             True iff a new snapshot should be created.
         """
-        candidates = [
-            (x.snaptime, x.target) for x in snaps if x.metadata.trigger in {"", "S"}
-        ]
-        # Append a placeholder to denote the backup that will be taken next.
-        # If this is deleted, it would indicate not to create new backup.
-        candidates.append((self._now, ""))
-
         delete_logic = auto_cleanup_without_ttl.DeleteLogic(self._config.deletion_rules)
-        for when, target in delete_logic.get_deletes(self._now, candidates):
-            if target == "":
-                logging.info(f"No new backup needed for {self._config.source}")
-                return False
+        need_new, deletes = delete_logic.get_deletes_with_new(
+            self._now, _scheduled_candidates(snaps)
+        )
+        for when, target in deletes:
             elapsed_secs = (self._now - when).total_seconds()
             if elapsed_secs > self._config.min_keep_secs:
                 snap = snap_holder.Snapshot(target)
@@ -149,11 +236,13 @@ class SnapOperator:
                     self._scheduled_to_delete.append(snap_holder.Snapshot(target))
                 else:
                     # Note: It will eventually get deleted, we just need to wait until TTL.
-                    logging.info(f"Refusing to clean up target with TTL: {target}")
+                    logging.info("Refusing to clean up target with TTL: %s", target)
             else:
-                logging.info(f"Not enough time passed, not deleting {target}")
+                logging.info("Not enough time passed, not deleting %s", target)
 
-        return True
+        if not need_new:
+            logging.info("No new backup needed for %s", self._config.source)
+        return need_new
 
     # Part of scheduled().
     def _scheduled_deletion_and_creation(
@@ -170,7 +259,9 @@ class SnapOperator:
         need_new, ttl_secs = self._get_scheduled_snapshot_ttl(snaps)
         if not need_new and ttl_secs != 0:
             # Unexpected. Possible logical error somewhere.
-            logging.warning(f"BUG DETECTED, {need_new=}, {ttl_secs=}")
+            logging.warning(
+                "BUG DETECTED, need_new=%r, ttl_secs=%r", need_new, ttl_secs
+            )
 
         # Handle snapshots without TTL.
         if not self._non_ttl_scheduled_deletion(snaps):
@@ -185,35 +276,36 @@ class SnapOperator:
     def _manage_scheduled_lifecycle(self, snaps: list[snap_holder.Snapshot]):
         wait_until = self._next_trigger_time(snaps)
         if wait_until is not None:
-            if self._now <= wait_until - configs.DURATION_BUFFER:
+            if self._now.timestamp() <= wait_until - configs.DURATION_BUFFER_SECS:
                 logging.info(
-                    f"Already triggered for {self._config.source}, wait until {wait_until}"
+                    "Already triggered for %s, wait until %s",
+                    self._config.source,
+                    datetime.datetime.fromtimestamp(wait_until),
                 )
                 return
 
         # Manage deletions and check if new backup is needed.
         need_new, ttl_secs = self._scheduled_deletion_and_creation(snaps)
         if need_new:
-            snapshot = snap_holder.Snapshot(self._config.dest_prefix + self._now_str)
-            snapshot.metadata.trigger = "S"
+            snapshot = snap_holder.Snapshot(self._new_target)
+            snapshot.metadata.trigger = _TRIG_SCHEDULED
             if ttl_secs > 0:
                 snapshot.metadata.expiry = int(self._now.timestamp()) + ttl_secs
             snapshot.create_from(self._config.snap_type, self._config.source)
             self.snaps_created = True
+            self._snaps_cache = None
 
     def _create_and_maintain_n_backups(
         self, count: int, trigger: str, comment: Optional[str]
     ):
-        logging.info(f"Maintain {count} volumes of type {trigger}.")
+        logging.info("Maintain %d volumes of type %s.", count, trigger)
         if not self._config.is_compatible_volume():
-            logging.warning(f"Not a compatible volume {self._config.source}.")
+            logging.warning("Not a compatible volume %s.", self._config.source)
             return
         # Find previous snaps.
         # Doing this before the update handles dryrun (where no new snap is created).
         previous_snaps = [
-            x
-            for x in _get_existing_snaps(self._config)
-            if x.metadata.trigger == trigger
+            x for x in self._existing_snaps() if x.metadata.trigger == trigger
         ]
 
         if count > 0:
@@ -221,12 +313,13 @@ class SnapOperator:
             # will create one more).
             n_snaps_to_leave = count - 1
             # Create a new snap.
-            snapshot = snap_holder.Snapshot(self._config.dest_prefix + self._now_str)
+            snapshot = snap_holder.Snapshot(self._new_target)
             snapshot.metadata.trigger = trigger
             if comment:
                 snapshot.metadata.comment = comment
             snapshot.create_from(self._config.snap_type, self._config.source)
             self.snaps_created = True
+            self._snaps_cache = None
         else:
             # From existing snaps, delete all.
             n_snaps_to_leave = 0
@@ -235,11 +328,12 @@ class SnapOperator:
         for expired in _all_but_last_k(previous_snaps, n_snaps_to_leave):
             expired.delete()
             self.snaps_deleted = True
+            self._snaps_cache = None
 
     def create(self, comment: Optional[str]):
         try:
             self._create_and_maintain_n_backups(
-                count=self._config.keep_user, trigger="U", comment=comment
+                count=self._config.keep_user, trigger=_TRIG_USER, comment=comment
             )
         except PermissionError:
             os_utils.eprint(
@@ -248,27 +342,30 @@ class SnapOperator:
 
     def on_pacman(self):
         last_snap: Optional[snap_holder.Snapshot] = None
-        for snap in _get_existing_snaps(self._config):
-            if snap.metadata.trigger == "I":
+        # Snaps are chronological; search from the newest to read fewer metadata.
+        for snap in reversed(self._existing_snaps()):
+            if snap.metadata.trigger == _TRIG_INSTALL:
                 last_snap = snap
+                break
         if last_snap is not None:
             time_since = (self._now - last_snap.snaptime).total_seconds()
             if time_since < self._config.preinstall_interval:
                 logging.info(
-                    f"Only {time_since:0.0f}s has passed since last install, "
-                    f"need {self._config.preinstall_interval:0.0f}s. Skipping."
+                    "Only %.0fs has passed since last install, need %.0fs. Skipping.",
+                    time_since,
+                    self._config.preinstall_interval,
                 )
                 return
         self._create_and_maintain_n_backups(
             count=self._config.keep_preinstall,
-            trigger="I",
+            trigger=_TRIG_INSTALL,
             comment=os_utils.last_pacman_command(),
         )
 
     def _next_trigger_time(
         self, scheduled_snaps: list[snap_holder.Snapshot]
-    ) -> Optional[datetime.datetime]:
-        """Returns the next time after which a scheduled backup can trigger."""
+    ) -> Optional[int]:
+        """Returns the epoch secs after which a scheduled backup can trigger."""
         if not scheduled_snaps:
             return None
         # Check if we should trigger a backup.
@@ -277,12 +374,9 @@ class SnapOperator:
         # so we just choose phase = 0 or UTC.
         phase = 0
         previous_mod = (
-            scheduled_snaps[-1].snaptime - datetime.timedelta(seconds=phase)
-        ).timestamp() // self._config.trigger_interval
-        wait_until = datetime.datetime.fromtimestamp(
-            (previous_mod + 1) * self._config.trigger_interval + phase
-        )
-        return wait_until
+            scheduled_snaps[-1].snaptime_ts - phase
+        ) // self._config.trigger_interval
+        return int((previous_mod + 1) * self._config.trigger_interval + phase)
 
     def scheduled(self):
         """Triggers periodically by the system timer."""
@@ -297,17 +391,18 @@ class SnapOperator:
         self._scheduled_to_delete = []
 
         # Delete expired snaps with TTL. Carry out irrespective of the waiting time.
-        snaps = list(_get_existing_snaps(self._config))
+        snaps = list(self._existing_snaps())
         snaps = self._delete_expired_ttl(snaps)
 
         # All _scheduled_ snaps that will remain.
-        scheduled_snaps = [x for x in snaps if "S" in x.metadata.trigger]
+        scheduled_snaps = [x for x in snaps if x.metadata.trigger == _TRIG_SCHEDULED]
 
         self._manage_scheduled_lifecycle(scheduled_snaps)
 
         for snap in self._scheduled_to_delete:
             snap.delete()
             self.snaps_deleted = True
+            self._snaps_cache = None
 
     def list_snaps(self):
         """Print the backups for humans."""
@@ -315,13 +410,12 @@ class SnapOperator:
         # Just display the log if it's not a btrfs volume.
         _ = self._config.is_compatible_volume()
         print(f"Snaps at: {self._config.dest_prefix}...")
-        for snap in _get_existing_snaps(self._config):
+        # Rows are written in one go rather than a print() per snapshot.
+        out_lines: list[str] = []
+        for snap in self._existing_snaps():
             columns: list[str] = []
-            columns.append("  " + snap.target.removeprefix(self._config.dest_prefix))
-            trigger_str = "".join(
-                c if snap.metadata.trigger == c else " " for c in "SIU"
-            )
-            columns.append(trigger_str)
+            columns.append("  " + snap.target[self._prefix_len :])
+            columns.append(_TRIGGER_COLS.get(snap.metadata.trigger, "   "))
             # print(f'{snap.snaptime}  ', end='')
             elapsed = (self._now - snap.snaptime).total_seconds()
             elapsed_str = "(" + human_interval.humanize(elapsed) + " ago)"
@@ -334,23 +428,28 @@ class SnapOperator:
             columns.append(f"{ttl_str:<18}")
 
             columns.append(snap.metadata.comment)
-            print("  ".join(columns))
-        print("")
+            out_lines.append("  ".join(columns))
+        out_lines.append("")
+        sys.stdout.write("\n".join(out_lines) + "\n")
 
     def _snaps_json_iter(self) -> Iterator[str]:
-        result: dict[str, Any] = {
-            "config_file": self._config.config_file,
-            "source": self._config.source,
-        }
+        config_file = self._config.config_file
+        source = self._config.source
+        prefix = self._config.dest_prefix
         # Just display the log if it's not a btrfs volume.
         _ = self._config.is_compatible_volume()
-        result["file"] = {"prefix": self._config.dest_prefix}
-        for snap in _get_existing_snaps(self._config):
-            result["file"]["timestamp"] = snap.target.removeprefix(
-                self._config.dest_prefix
-            )
+        for snap in self._existing_snaps():
+            # A fresh dict per row, so optional keys like expiry don't leak.
+            result: dict[str, Any] = {
+                "config_file": config_file,
+                "source": source,
+                "file": {
+                    "prefix": prefix,
+                    "timestamp": snap.target[self._prefix_len :],
+                },
+            }
             result.update(snap.as_json())
-            yield json.dumps(result, sort_keys=True, separators=(",", ":"))
+            yield _JSON_ENCODE(result)
 
     def list_snaps_json(self):
         """Print snaps for machine readable code."""
@@ -14,6 +14,8 @@
 
 import contextlib
 import datetime
+import os
+import tempfile
 import time
 import unittest
 from unittest import mock
@@ -261,6 +263,41 @@ class SnapOperatorTest(unittest.TestCase):
             ],
         )
 
+    def test_list_json_expiry_per_snap(self):
+        self._old_snaps = [
+            snap_holder.Snapshot("/tmp/nodir/@home-20230213001000"),
+            snap_holder.Snapshot("/tmp/nodir/@home-20230214001000"),
+        ]
+        self._old_snaps[0].metadata.expiry = 1700000000.0
+        snapper = snap_operator.SnapOperator(
+            config=configs.Config(
+                config_file="config_file",
+                source="snap_source",
+                dest_prefix="/tmp/nodir/@home-",
+            ),
+            now=_FAKE_NOW,
+        )
+        lines = list(snapper._snaps_json_iter())
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"expiry":1700000000.0', lines[0])
+        # The expiry of the first snap must not carry over to the next row.
+        self.assertNotIn("expiry", lines[1])
+
+    def test_find_target_skips_metadata(self):
+        self._old_snaps = [
+            snap_holder.Snapshot("/tmp/nodir/@home-20230213001000"),
+            snap_holder.Snapshot("/tmp/nodir/@home-20230214001000"),
+        ]
+        config = configs.Config(
+            config_file="config_file",
+            source="snap_source",
+            dest_prefix="/tmp/nodir/@home-",
+        )
+        with mock.patch.object(snap_holder._Metadata, "load_file") as mock_load_file:
+            snap = snap_operator.find_target(config, "20230214001000")
+        self.assertIs(snap, self._old_snaps[1])
+        mock_load_file.assert_not_called()
+
     def test_all_but_k(self):
         self.assertEqual(list(snap_operator._all_but_last_k([1, 2, 3, 4], 2)), [1, 2])
         self.assertEqual(
@@ -319,5 +356,57 @@ class SnapOperatorTest(unittest.TestCase):
         super().tearDown()
 
 
+class PrefetchAllTest(unittest.TestCase):
+    def test_prefetch_all(self):
+        with tempfile.TemporaryDirectory() as dir:
+            for name in [
+                "@home-20241102000000",
+                "@root-20241101000000",
+                "@home-20241101000000",
+            ]:
+                os.mkdir(os.path.join(dir, name))
+            configs_list = [
+                configs.Config(
+                    config_file=f"{name}.conf",
+                    source=f"/{name}",
+                    dest_prefix=os.path.join(dir, f"@{name}-"),
+                )
+                for name in ["home", "root"]
+            ]
+            configs_list.append(
+                configs.Config(
+                    config_file="missing.conf",
+                    source="/missing",
+                    dest_prefix=os.path.join(dir, "nodir", "@missing-"),
+                )
+            )
+
+            list_dir = snap_operator._list_dir
+            with mock.patch.object(
+                snap_operator,
+                "_list_dir",
+                side_effect=lambda destdir: sorted(
+                    list_dir(destdir), key=lambda x: x.name, reverse=True
+                ),
+            ) as mock_list_dir:
+                existing = snap_operator.prefetch_all(configs_list)
+
+            # The shared directory is only listed once.
+            mock_list_dir.assert_called_once_with(dir)
+            self.assertCountEqual(existing.keys(), ["home.conf", "root.conf"])
+            # Chronological, regardless of the directory listing order.
+            self.assertEqual(
+                [x.target for x in existing["home.conf"]],
+                [
+                    os.path.join(dir, "@home-20241101000000"),
+                    os.path.join(dir, "@home-20241102000000"),
+                ],
+            )
+            self.assertEqual(
+                [x.target for x in existing["root.conf"]],
+                [os.path.join(dir, "@root-20241101000000")],
+            )
+
+
 if __name__ == "__main__":
     unittest.main()